@@ -12,20 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import calendar
 import datetime
 import enum
 import functools
-import math
-import re
-import typing
+import operator
 
 
 class InvalidFuzidateError(ValueError):
     """Raised when fuzidate is invalid."""
 
 
-@functools.total_ordering
 class Precision(enum.Enum):
     """Levels of precision applied to fuzidate.
 
@@ -40,19 +36,57 @@ class Precision(enum.Enum):
     def __lt__(self, other):
         if not isinstance(other, Precision):
             return NotImplemented
-        return self.value < other.value
+        return self._value_ < other._value_
+
+    def __le__(self, other):
+        if not isinstance(other, Precision):
+            return NotImplemented
+        return self._value_ <= other._value_
+
+    def __gt__(self, other):
+        if not isinstance(other, Precision):
+            return NotImplemented
+        return self._value_ > other._value_
+
+    def __ge__(self, other):
+        if not isinstance(other, Precision):
+            return NotImplemented
+        return self._value_ >= other._value_
+
+
+_MIN_YEAR = datetime.MINYEAR
+_MAX_YEAR = datetime.MAXYEAR
+
+# Enum member lookups are comparatively slow, so hot paths use these.
+_P_NONE = Precision.none
+_P_YEAR = Precision.year
+_P_MONTH = Precision.month
+_P_DAY = Precision.day
+
+_PRECISIONS = (_P_NONE, _P_YEAR, _P_MONTH, _P_DAY)
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _days_in_month(year, month):
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+_INTERN_MAX_SIZE = 4096
+_interned = {}
 
 
-@functools.total_ordering
 class Fuzidate:
     """Main class representing an imprecise date."""
 
+    __slots__ = ('__year', '__month', '__day', '__offset', '__number',
+                 '__key', '__precision', '__high', '__low', '__validated')
+
     max = None  # type: ClassVar[datetime.date]
     min = None  # type: ClassVar[datetime.date]
     unknown = None  # type: ClassVar[datetime.date]
-    __high = None
-    __low = None
-    __validated = False
 
     @property
     def number(self) -> int:
@@ -83,7 +117,7 @@ class Fuzidate:
         the understanding that integers with unknown dates are ordered before
         known dates. For example 19140700 naturally comes before 19140728.
         """
-        return (self.__year * 10000) + (self.__month * 100) + self.__day
+        return self.__number
 
     @property
     def offset(self) -> int:
@@ -121,151 +155,235 @@ class Fuzidate:
     @property
     def precision(self) -> Precision:
         """Known precision of fuzidate."""
-        if not self.year:
-            return Precision.none
-        elif not self.month:
-            return Precision.year
-        elif not self.day:
-            return Precision.month
-        else:
-            return Precision.day
+        return self.__precision
 
     @property
     def high(self) -> datetime.date:
         """Upper bound date."""
-        self.check_valid()
-        return self.__high
+        high = self.__high
+        if high is None:
+            self.check_valid()
+            high = self.__high = self.__calc_high()
+        return high
 
     @property
     def low(self) -> datetime.date:
         """Lower bound date."""
-        if not self.__low:
+        low = self.__low
+        if low is None:
             self.check_valid()
-            self.__low = datetime.date(self.year or datetime.date.min.year,
-                                       self.month or 1,
-                                       self.day or 1)
-        return self.__low
+            low = self.__low = datetime.date(
+                self.__year or datetime.date.min.year,
+                self.__month or 1,
+                self.__day or 1)
+        return low
 
     @property
-    def range(self) -> typing.Tuple[datetime.date, datetime.date]:
-        """Date range represented by this fuzidate."""
+    def range(self) -> tuple:
+        """Date range represented by this fuzidate as (low, high) dates."""
         return self.low, self.high
 
-    def __init__(self, year: int, month: int, day: int, offset: int = 0, *,
-                 validate: bool = True):
+    def __new__(cls, year: int, month: int, day: int, offset: int = 0, *,
+                validate: bool = True):
+        # Fuzidates are immutable, so commonly used values are shared rather
+        # than rebuilt. Only plain ints are shared, since the key compares
+        # by value and equal values of other types (1914.0, numpy ints)
+        # must keep their own type.
+        key = (cls, year, month, day, offset)
+        shared = (type(year) is int and type(month) is int
+                  and type(day) is int and type(offset) is int)
+        self = _interned.get(key) if shared else None
+        if self is not None:
+            if validate:
+                self.check_valid()
+            return self
+
+        self = super().__new__(cls)
         self.__year = year
         self.__month = month
         self.__day = day
         self.__offset = offset
+        self.__number = (year * 10000) + (month * 100) + day
+        # Built once so comparisons do not allocate. Compares the
+        # components rather than the packed number, which is not unique
+        # for invalid data.
+        self.__key = (year, month, day, offset)
+        # Each known component only counts if all larger ones are known.
+        self.__precision = _PRECISIONS[
+            (year != 0) * (1 + (month != 0) * (1 + (day != 0)))]
+        self.__high = None
+        self.__low = None
+        self.__validated = False
+
         if validate:
             self.check_valid()
+        # Only shared once accepted, so rejected input cannot fill the table.
+        if shared and len(_interned) < _INTERN_MAX_SIZE:
+            _interned[key] = self
+        return self
 
-    @staticmethod
-    def __calc_high(precision, year, month, day, offset):
-        if precision < Precision.month:
-            month = 12
+    def __init__(self, year: int, month: int, day: int, offset: int = 0, *,
+                 validate: bool = True):
+        # All construction and validation happens in __new__. Kept so that
+        # subclasses may still call super().__init__ with the same arguments.
+        pass
+
+    def __calc_high(self):
+        # Only called for valid fuzidates, except from check_valid where
+        # only the offset remains to be checked.
+        precision = self.__precision
+        year, month, offset = self.__year, self.__month, self.__offset
+
+        if precision is _P_DAY:
+            # A precise date is its own low bound and the high bound is a
+            # plain offset from its ordinal.
+            low = self.__low or datetime.date(year, month, self.__day)
+            if offset:
+                try:
+                    high = datetime.date.fromordinal(low.toordinal() + offset)
+                except (OverflowError, ValueError):
+                    raise InvalidFuzidateError('Offset out of range') from None
+            else:
+                high = low
+            self.__low = low
+            return high
+        elif precision is _P_NONE:
+            return datetime.date.max
 
-        if precision < Precision.day:
-            day = calendar.monthrange(year, month)[1]
+        if precision is _P_YEAR:
+            month = 12
 
         if offset:
-            if precision is Precision.year:
+            if precision is _P_YEAR:
                 year += offset
-            elif precision is Precision.month:
-                high_months = month + offset
-                year += int((high_months - 1) / 12)
-                month = high_months % 12
-                if not month:
-                    month = 12
-                try:
-                    day = calendar.monthrange(year, month)[1]
-                except ValueError:
-                    raise InvalidFuzidateError('Offset out of range') from None
-            elif precision is Precision.day:
-                delta = datetime.timedelta(seconds=offset * (60 * 60 * 24))
-                d = datetime.date(year, month, day)
-                try:
-                    high = d + delta
-                except OverflowError:
-                    raise InvalidFuzidateError('Offset out of range') from None
-                else:
-                    return high
+            else:
+                years, month = divmod(month - 1 + offset, 12)
+                year += years
+                month += 1
 
         try:
-            return datetime.date(year, month, day)
+            return datetime.date(year, month, _days_in_month(year, month))
         except ValueError:
             raise InvalidFuzidateError('Offset out of range') from None
 
-    def check_valid(self):
-        """Check if fuzidate is valid.
-
-        Raises InvalidFuzidate if not valid, else does nothing.
-        """
-        if self.__validated:
-            return
-
-        offset = self.__offset
-        if not (self.__year or self.__month or self.__day):
-            if offset:
-                raise InvalidFuzidateError(
-                    'Unknown fuzidate may not have offset')
-
-            self.__high = datetime.date.max
-            self.__validated = True
-            return
-
-        day = self.day
-        precision = self.precision
+    @staticmethod
+    def __raise_invalid(precision, year, month, day):
+        # Determines which rule a fuzidate breaks. Only called once the
+        # combined check in check_valid has failed.
 
-        # Check basic number construction.
-        if precision < Precision.day:
-            if day:
-                raise InvalidFuzidateError('Day must not be set')
+        # Check basic number construction. A set month implies at least
+        # month precision unless the year is missing.
+        if day and precision is not _P_DAY:
+            raise InvalidFuzidateError('Day must not be set')
 
-        month = self.month
         if month < 0:
             raise InvalidFuzidateError('Month must not be negative')
-        if precision < Precision.month:
-            if month:
-                raise InvalidFuzidateError('Month must not be set')
+        if month and precision is _P_NONE:
+            raise InvalidFuzidateError('Month must not be set')
 
         # Check that values are in correct range.
-        year = self.year
         if year < 0:
             raise InvalidFuzidateError('Year must not be negative')
-        if day:
-            if day > calendar.monthrange(year, month)[1]:
-                raise InvalidFuzidateError('Invalid day: {}'.format(day))
-
         if month:
             if month > 12:
                 raise InvalidFuzidateError('Invalid month: {}'.format(month))
 
-        if not (self.min.year <= year <= self.max.year):
+        if day:
+            if day > _days_in_month(year, month):
+                raise InvalidFuzidateError('Invalid day: {}'.format(day))
+
+        if not (_MIN_YEAR <= year <= _MAX_YEAR):
             raise InvalidFuzidateError('Invalid year: {}'.format(year))
 
         if day < 0:
             raise InvalidFuzidateError('Day must not be negative')
 
-        if offset < 0:
-            raise InvalidFuzidateError('Offset must not be negative')
+        raise InvalidFuzidateError('Offset must not be negative')
+
+    def check_valid(self):
+        """Check if fuzidate is valid.
+
+        Raises InvalidFuzidate if not valid, else does nothing.
+        """
+        if self.__validated:
+            return
+
+        year, month, day = self.__year, self.__month, self.__day
+        offset = self.__offset
+        precision = self.__precision
+
+        # Bounds are built lazily, so check here that they can be built at
+        # all. Integer-like types such as numpy ints are accepted.
+        if not (type(year) is int and type(month) is int
+                and type(day) is int and type(offset) is int):
+            try:
+                for value in (year, month, day, offset):
+                    operator.index(value)
+            except TypeError:
+                raise InvalidFuzidateError(
+                    'Components must be integers') from None
+
+        if precision is _P_NONE and not (month or day):
+            if offset:
+                raise InvalidFuzidateError(
+                    'Unknown fuzidate may not have offset')
+
+            self.__validated = True
+            return
 
-        self.__high = self.__calc_high(precision, year, month, day, offset)
+        if not (_MIN_YEAR <= year <= _MAX_YEAR
+                and 0 <= month <= 12
+                and offset >= 0
+                and (0 < day <= _days_in_month(year, month)
+                     if precision is _P_DAY else not day)):
+            self.__raise_invalid(precision, year, month, day)
+
+        # Check the offset keeps the high bound in range without building
+        # it. Adding days moves the year forward by at most
+        # offset // 365 + 1, so only dates near the end of the calendar
+        # need the exact calculation.
+        if precision is _P_DAY:
+            if year + offset // 365 >= _MAX_YEAR:
+                self.__high = self.__calc_high()
+        elif precision is _P_YEAR:
+            if year + offset > _MAX_YEAR:
+                raise InvalidFuzidateError('Offset out of range')
+        elif year + (month - 1 + offset) // 12 > _MAX_YEAR:
+            raise InvalidFuzidateError('Offset out of range')
 
         self.__validated = True
 
     @classmethod
     def from_date(cls, date: datetime.date) -> 'Fuzidate':
-        """Create precise fuzidate from exact date."""
-        return cls(date.year, date.month, date.day, validate=False)
+        """Create precise fuzidate from exact date.
+
+        Fuzidates are immutable, so the same instance is returned for
+        repeated dates.
+        """
+        return cls.__from_date(cls, date)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def __from_date(cls, date):
+        self = cls(date.year, date.month, date.day, validate=False)
+        if not self.__validated:
+            # An exact date is always valid and is its own range.
+            if type(date) is not datetime.date:
+                date = datetime.date(date.year, date.month, date.day)
+            self.__low = self.__high = date
+            self.__validated = True
+        return self
 
     @classmethod
     def from_int(cls, i: int, offset: int=0, *,
                  validate: bool = True):
-        """Create fuzidate from integer value and optional offset."""
-        year = math.floor(i / 10000)
-        month = (math.floor(i / 100)) % 100
-        day = i % 100
+        """Create fuzidate from integer value and optional offset.
+
+        Components are split with floor division, so a negative value such
+        as -19140700 decodes to year -1915, month 93 and day 0.
+        """
+        year, month_day = divmod(i, 10000)
+        month, day = divmod(month_day, 100)
         return cls(year, month, day, offset, validate=validate)
 
     @classmethod
@@ -281,61 +399,87 @@ class Fuzidate:
     @classmethod
     def parse(cls, s: str, *, validate: bool = True):
         """Parse fuzidate from string."""
-        match = re.match(r'^(\d+)(?:-(\d+)(?:-(\d+))?)?(\+\d+)?$', s)
-        if match:
-            year, month, day, offset = match.groups()
-        else:
+        # Grammar is <year>[-<month>[-<day>]][+<offset>], all decimal digits.
+        body, plus, offset = s.partition('+')
+        parts = body.split('-')
+        if (len(parts) > 3 or '' in parts
+                or not body.replace('-', '').isdecimal()
+                or (plus and not offset.isdecimal())):
             raise ValueError('Fuzidate parse error')
 
-        return cls(int(year or 0), int(month or 0), int(day or 0),
+        parts += ('0', '0')
+        return cls(int(parts[0]), int(parts[1]), int(parts[2]),
                    int(offset or 0), validate=validate)
 
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         if type(self) is not type(other):
             return NotImplemented
-        return (self.__year, self.__month, self.__day) == (
-            other.__year, other.__month, other.__day)
+        return self.__key == other.__key
 
-    def __lt__(self, other) -> bool:
+    def __ne__(self, other) -> bool:
+        if self is other:
+            return False
         if type(self) is not type(other):
             return NotImplemented
-        return (self.__year, self.__month, self.__day) < (
-            other.__year, other.__month, other.__day)
+        return self.__key != other.__key
 
-    def __bool__(self) -> bool:
-        self.check_valid()
-        return bool(self.__year or self.__month or self.__day
-                    or self.__offset)
+    def __lt__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.__key < other.__key
 
-    def __str__(self) -> str:
-        offset = self.offset
+    def __le__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.__key <= other.__key
 
-        year, month, day = self.year, self.month, self.day
+    def __gt__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.__key > other.__key
 
-        if not (year or month or day):
-            if offset:
-                return '0+' + str(offset)
-            else:
-                return '0'
+    def __ge__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.__key >= other.__key
 
-        if offset:
-            offset_str = '+{:d}'.format(offset)
-        else:
-            offset_str = ''
+    def __bool__(self) -> bool:
+        if not self.__validated:
+            self.check_valid()
+        # Only the unknown fuzidate is valid without a year.
+        return self.__precision is not _P_NONE
 
-        if not (month or day):
-            return '{}{}'.format(year, offset_str)
-        elif not day and year:
-            return '{}-{:02d}{}'.format(self.year, self.month, offset_str)
+    def __str__(self) -> str:
+        offset = self.__offset
+        year, month, day = self.__year, self.__month, self.__day
+        offset_str = '+%d' % offset if offset else ''
+
+        precision = self.__precision
+        if precision is _P_DAY:
+            return '%d-%02d-%02d%s' % (year, month, day, offset_str)
+        elif precision is _P_MONTH:
+            return '%d-%02d%s' % (year, month, offset_str)
+        elif precision is _P_YEAR and not day:
+            return '%d%s' % (year, offset_str)
+        elif not (month or day):
+            return '0' + offset_str
         else:
-            return '{}-{:02d}-{:02d}{}'.format(self.year, self.month, self.day,
-                                               offset_str)
+            # Invalid fuzidate with values set below its precision.
+            return '%d-%02d-%02d%s' % (year, month, day, offset_str)
 
     def __repr__(self) -> str:
-        return '{}.from_int({})'.format(type(self).__name__, self.number)
+        return '%s.from_int(%d)' % (type(self).__name__, self.__number)
 
     def __hash__(self) -> int:
-        return hash((self.__year, self.__month, self.__day, self.__offset))
+        return hash(self.__key)
+
+    def __reduce__(self):
+        # __new__ needs the components, and slots rule out the default
+        # state based pickling for protocols 0 and 1.
+        return (type(self).compose,
+                (self.__year, self.__month, self.__day, self.__offset, False))
 
 
 compose = Fuzidate.compose
@@ -344,8 +488,14 @@ from_int = Fuzidate.from_int
 parse = Fuzidate.parse
 
 Fuzidate.max = from_date(datetime.date.max)
-Fuzidate.min = from_int(datetime.date.min.year * 10000, validate=False)
-Fuzidate.unknown = from_int(0, validate=False)
+Fuzidate.min = from_int(datetime.date.min.year * 10000)
+Fuzidate.unknown = from_int(0)
+
+# Fill in the bounds of the constants now rather than on first use. They are
+# interned first, so the constructors return these same instances.
+_ = Fuzidate.min.range
+_ = Fuzidate.unknown.range
+del _
 
 
 __all__ = [
@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import datetime
+import importlib
+import pickle
 
 import pytest
 
@@ -21,46 +24,122 @@ import fuzidate as fzd
 OUTBREAK = datetime.date(1914, 7, 28)
 OUTBREAK_FZD = fzd.Fuzidate.from_int(19140728)
 
+_PRECISIONS = tuple(fzd.Precision)
+
 
 def test_from_date():
     assert fzd.Fuzidate.from_date(OUTBREAK).number == 19140728
 
 
+def test_from_date_range():
+    assert fzd.Fuzidate.from_date(OUTBREAK).range == (OUTBREAK, OUTBREAK)
+
+
+def test_from_datetime_range():
+    armistice = datetime.datetime(1918, 11, 11, 11)
+    assert fzd.Fuzidate.from_date(armistice).range == (
+        datetime.date(1918, 11, 11), datetime.date(1918, 11, 11))
+
+
+def test_from_date_cached():
+    assert fzd.Fuzidate.from_date(OUTBREAK) is fzd.Fuzidate.from_date(OUTBREAK)
+
+
 def test_constants():
     assert fzd.Fuzidate.max.number == 99991231
     assert fzd.Fuzidate.min.number == 10000
     assert fzd.Fuzidate.unknown.number == 0
 
 
+def test_constants_interned():
+    assert fzd.Fuzidate.from_int(0) is fzd.Fuzidate.unknown
+    assert fzd.Fuzidate.compose() is fzd.Fuzidate.unknown
+    assert fzd.Fuzidate.from_date(datetime.date.max) is fzd.Fuzidate.max
+
+
+def test_interned():
+    assert fzd.Fuzidate.from_int(19140728) is OUTBREAK_FZD
+    assert fzd.Fuzidate.from_int(19140728, 1) is not OUTBREAK_FZD
+
+
+def test_rejected_not_interned():
+    interned = importlib.import_module('fuzidate.fuzidate')._interned
+    size = len(interned)
+    for offset in range(10):
+        with pytest.raises(fzd.InvalidFuzidateError):
+            fzd.Fuzidate.compose(1914, 2, 30, offset)
+    assert len(interned) == size
+
+
+def test_not_interned_across_types():
+    fzd.Fuzidate.compose(1915.0, 7, 28, validate=False)
+    assert type(fzd.Fuzidate.compose(1915, 7, 28).year) is int
+    assert type(fzd.Fuzidate.compose(1916.0, 7, 28,
+                                     validate=False).year) is float
+
+
+def test_subclass_init():
+
+    class Subclass(fzd.Fuzidate):
+
+        def __init__(self, year, month, day, offset=0, *, validate=True):
+            super().__init__(year, month, day, offset, validate=validate)
+
+    assert Subclass.compose(1914, 7, 28).number == 19140728
+
+
 def test_in_dict():
     {OUTBREAK_FZD: 'outbreak'}
 
 
+def test_slots():
+    assert not hasattr(OUTBREAK_FZD, '__dict__')
+
+
+@pytest.mark.parametrize('protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle(protocol):
+    for value in (OUTBREAK_FZD, fzd.Fuzidate.from_int(19140700, 2),
+                  fzd.Fuzidate.from_int(19140740, validate=False)):
+        restored = pickle.loads(pickle.dumps(value, protocol))
+        assert (restored.number, restored.offset) == (value.number,
+                                                      value.offset)
+
+
+@pytest.mark.parametrize('copier', [copy.copy, copy.deepcopy])
+def test_copy(copier):
+    assert copier(OUTBREAK_FZD) == OUTBREAK_FZD
+
+
 class TestPrecisionOrder:
 
     @staticmethod
-    @pytest.mark.parametrize('prec', [sorted(fzd.Precision)])
+    @pytest.mark.parametrize('prec', _PRECISIONS)
     def test_eq(prec):
         assert prec == prec
 
     @staticmethod
-    @pytest.mark.parametrize('index',
-                             list(range(len(fzd.Precision))))
+    @pytest.mark.parametrize('index', list(range(len(_PRECISIONS))))
     def test_not_eq(index):
-        precisions = list(fzd.Precision)
-        l = precisions[index]
-        r = precisions[(index + 1) % len(fzd.Precision)]
+        l = _PRECISIONS[index]
+        r = _PRECISIONS[(index + 1) % len(_PRECISIONS)]
         assert l != r
 
     @staticmethod
-    @pytest.mark.parametrize('index',
-                             list(range(len(fzd.Precision) - 1)))
+    @pytest.mark.parametrize('index', list(range(len(_PRECISIONS) - 1)))
     def test_lt(index):
-        precisions = list(fzd.Precision)
-        l = precisions[index]
-        r = precisions[index + 1]
+        l = _PRECISIONS[index]
+        r = _PRECISIONS[index + 1]
         assert l < r
 
+    @staticmethod
+    @pytest.mark.parametrize('index', list(range(len(_PRECISIONS) - 1)))
+    def test_gt(index):
+        l = _PRECISIONS[index]
+        r = _PRECISIONS[index + 1]
+        assert r > l
+        assert r >= l
+        assert l <= r
+
     def test_lt_invalid(self):
         with pytest.raises(TypeError):
             fzd.Precision.day < 1
@@ -122,6 +201,16 @@ class TestProperties:
             assert (fzd.Fuzidate.from_int(19180728).precision
                     is fzd.Precision.day)
 
+        @staticmethod
+        def test_missing_year():
+            assert (fzd.Fuzidate.from_int(728, validate=False).precision
+                    is fzd.Precision.none)
+
+        @staticmethod
+        def test_missing_month():
+            assert (fzd.Fuzidate.from_int(19180028, validate=False).precision
+                    is fzd.Precision.year)
+
     class TestIsValid:
 
         @staticmethod
@@ -327,9 +416,17 @@ class TestParse:
                 == fzd.Fuzidate.from_int(19140728, 2))
 
     @staticmethod
-    def test_unparseable():
+    @pytest.mark.parametrize('s', ['invalid', '1914-', '1914--07', '-1914',
+                                   '+5', '1914+', '1914-07-28-01',
+                                   '1914+2+3', '', '\u00b2'])
+    def test_unparseable(s):
         with pytest.raises(ValueError, match=r'Fuzidate parse error'):
-            fzd.Fuzidate.parse('invalid')
+            fzd.Fuzidate.parse(s)
+
+    @staticmethod
+    def test_trailing_newline():
+        with pytest.raises(ValueError, match=r'Fuzidate parse error'):
+            fzd.Fuzidate.parse('1914\n')
 
     @staticmethod
     def test_parse_invalid():
@@ -361,9 +458,26 @@ class TestFuzidateOrder:
             assert OUTBREAK_FZD == fzd.Fuzidate.from_int(19140728)
 
         @staticmethod
-        @pytest.mark.parametrize('number', [19181111, 19140700, 19140000, 0])
-        def test_is_ne(number):
-            assert OUTBREAK_FZD != fzd.Fuzidate.from_int(number)
+        @pytest.mark.parametrize('other', [
+            fzd.Fuzidate.from_int(n)
+            for n in (19181111, 19140700, 19140000, 0)], ids=str)
+        def test_is_ne(other):
+            assert OUTBREAK_FZD != other
+
+        @staticmethod
+        @pytest.mark.parametrize('invalid, valid', [
+            (fzd.Fuzidate.compose(1914, 7, 128, validate=False),
+             fzd.Fuzidate.compose(1914, 8, 28)),
+            (fzd.Fuzidate.from_int(19140728, 10 ** 9, validate=False),
+             fzd.Fuzidate.from_int(19140729)),
+        ])
+        def test_invalid_values_stay_distinct(invalid, valid):
+            assert invalid != valid
+            assert len({invalid, valid}) == 2
+
+        @staticmethod
+        def test_offset_is_ne():
+            assert OUTBREAK_FZD != fzd.Fuzidate.from_int(19140728, 1)
 
     class TestLt:
 
@@ -375,14 +489,38 @@ class TestFuzidateOrder:
                 assert 19140728 < OUTBREAK_FZD
 
         @staticmethod
-        @pytest.mark.parametrize('number', [19140729, 19140800, 19150000])
-        def test_is_lt(number):
-            assert OUTBREAK_FZD < fzd.Fuzidate.from_int(number)
+        @pytest.mark.parametrize('other', [
+            fzd.Fuzidate.from_int(n)
+            for n in (19140729, 19140800, 19150000)], ids=str)
+        def test_is_lt(other):
+            assert OUTBREAK_FZD < other
 
         @staticmethod
-        @pytest.mark.parametrize('number', [19140727, 19140700, 19140000])
-        def test_is_ge(number):
-            assert OUTBREAK_FZD >= fzd.Fuzidate.from_int(number)
+        def test_offset_is_lt():
+            assert (fzd.Fuzidate.from_int(19140700, 2)
+                    < fzd.Fuzidate.from_int(19140700, 3)
+                    < fzd.Fuzidate.from_int(19140701))
+
+        @staticmethod
+        @pytest.mark.parametrize('other', [
+            fzd.Fuzidate.from_int(n)
+            for n in (19140727, 19140700, 19140000)], ids=str)
+        def test_is_ge(other):
+            assert OUTBREAK_FZD >= other
+
+        @staticmethod
+        @pytest.mark.parametrize('other', [
+            fzd.Fuzidate.from_int(n)
+            for n in (19140727, 19140700, 19140000)], ids=str)
+        def test_is_gt(other):
+            assert OUTBREAK_FZD > other
+
+        @staticmethod
+        @pytest.mark.parametrize('other', [
+            fzd.Fuzidate.from_int(n)
+            for n in (19140728, 19140729, 19150000)], ids=str)
+        def test_is_le(other):
+            assert OUTBREAK_FZD <= other
 
 
 class TestCompose:
@@ -442,6 +580,12 @@ class TestFromInt:
         assert (fzd.Fuzidate.from_int(-19140700, 2, validate=False) ==
                 fzd.Fuzidate.compose(-1915, 93, offset=2, validate=False))
 
+    @staticmethod
+    def test_large():
+        assert (fzd.Fuzidate.from_int(123456789012345671231, validate=False) ==
+                fzd.Fuzidate.compose(12345678901234567, 12, 31,
+                                     validate=False))
+
     @staticmethod
     def test_check_valid():
         with pytest.raises(fzd.InvalidFuzidateError,
@@ -475,6 +619,18 @@ class TestCheckValid:
                            match='Day must not be negative'):
             fzd.Fuzidate.compose(1914, 7, -1).check_valid()
 
+    @staticmethod
+    @pytest.mark.parametrize('args', [(1914.0, 7, 28, 0),
+                                      (1914, 7.0, 0, 0),
+                                      (1914, 7, 28, 1.0),
+                                      (0.0, 0, 0, 0)])
+    def test_non_integer_components(args):
+        invalid = fzd.Fuzidate.compose(*args, validate=False)
+        assert not invalid.is_valid
+        with pytest.raises(fzd.InvalidFuzidateError,
+                           match='Components must be integers'):
+            fzd.Fuzidate.compose(*args)
+
     @staticmethod
     def test_negative_offset():
         with pytest.raises(fzd.InvalidFuzidateError,
@@ -514,6 +670,13 @@ class TestCheckValid:
                            match='Invalid month: 13'):
             invalid.check_valid()
 
+    @staticmethod
+    def test_invalid_month_with_day():
+        invalid = fzd.Fuzidate.compose(1914, 13, 1, validate=False)
+        with pytest.raises(fzd.InvalidFuzidateError,
+                           match='Invalid month: 13'):
+            invalid.check_valid()
+
     @staticmethod
     def test_invalid_year():
         invalid = fzd.Fuzidate.compose(datetime.date.max.year + 1,
@@ -538,6 +701,29 @@ class TestCheckValid:
                            match='Offset out of range'):
             invalid.check_valid()
 
+    @staticmethod
+    @pytest.mark.parametrize('args', [(9999, 0, 0, 1),
+                                      (9999, 12, 0, 1),
+                                      (9999, 12, 31, 1),
+                                      (9990, 1, 1, 3652),
+                                      (1914, 7, 28, 2 ** 31)])
+    def test_offset_out_of_range_on_construction(args):
+        with pytest.raises(fzd.InvalidFuzidateError,
+                           match='Offset out of range'):
+            fzd.Fuzidate.compose(*args)
+
+    @staticmethod
+    def test_huge_day_offset_is_invalid():
+        invalid = fzd.Fuzidate.compose(1914, 7, 28, 2 ** 31, validate=False)
+        assert not invalid.is_valid
+        with pytest.raises(fzd.InvalidFuzidateError):
+            bool(invalid)
+
+    @staticmethod
+    def test_offset_to_max():
+        assert (fzd.Fuzidate.compose(9990, 1, 1, 3651).high
+                == datetime.date.max)
+
     @staticmethod
     def test_invalid_day_by_offset():
         invalid = fzd.Fuzidate.compose(datetime.date.max.year, 12, 31,